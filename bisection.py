@@ -2,14 +2,16 @@ from typing import Callable
 import math
 import dataclasses
 from tabulate import tabulate
+import numpy as np
+from intervalScan import bracketKernelSignature, compileKernel, compileBracketBatch, dumpRecords, memoizePerFunction, resultRecords, scanSignChanges
 import time
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class Interval:
     low: float
     high: float
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class BisectionRoot:
     root: float
     iterations: int
@@ -17,88 +19,121 @@ class BisectionRoot:
     time: float = 0.0
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class BisectionResult:
     interval: Interval
     root: BisectionRoot
 
 
+@dataclasses.dataclass
+class BisectionResultArrays:
+    lows: np.ndarray
+    highs: np.ndarray
+    roots: np.ndarray
+    iterations: np.ndarray
+    errors: np.ndarray
+    times: np.ndarray
+
+    def __len__(self) -> int:
+        return self.roots.size
+
+    def toRecords(self) -> np.recarray:
+        return resultRecords(self.roots, self.iterations, self.errors, self.times)
+
+
+def _bisectKernel(func: Callable[[float],float]) -> Callable[[float, float, float, int], tuple[float, int, float]]:
+    def kernel(a: float, b: float, tol: float, maxIterations: int) -> tuple[float, int, float]:
+        for i in range(maxIterations):
+            # a + (b - a) / 2 cannot overflow for large brackets, and |half|
+            # is the bracket width after this step
+            half = (b - a) * 0.5
+            x1 = a + half
+            # conditional expressions rather than an if/else so the
+            # compiled loop uses selects instead of a 50/50 branch
+            upper = func(x1) > 0.0
+            b = x1 if upper else b
+            a = a if upper else x1
+            if abs(half) < tol:
+                return x1, i + 1, abs(half)
+        # iterations == -1 marks an interval that did not converge
+        return a + (b - a) * 0.5, -1, abs(b - a)
+    return kernel
+
+
+def makeBisectKernel(func: Callable[[float],float]) -> Callable[[float, float, float, int], tuple[float, int, float]]:
+    return compileKernel(_bisectKernel, (func,), bracketKernelSignature)
+
+
+@memoizePerFunction
+def makeBisectBatchKernel(func: Callable[[float],float]) -> Callable[[np.ndarray, np.ndarray, float, int], tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    # Batches are memoized per function, so repeated findRoots calls on the
+    # same function skip the JIT compile.
+    return compileBracketBatch(makeBisectKernel(func))
+
 
 class BisectionRootFinder:
-    def __init__(self, intervalStartPoint:float = 0.0, intervalStepSize:float = 1.0, intervalMaxSteps:int = 1000, rootTolerance:float = 1e-7, rootFindingMaximumIterations:int = 1000):
+    def __init__(self, intervalStartPoint:float = 0.0, intervalStepSize:float = 1.0, intervalMaxSteps:int = 1000, rootTolerance:float = 1e-7, rootFindingMaximumIterations:int = 1000, scanFloat32MinStepSize:float = math.inf):
         self.intervalStartPoint = intervalStartPoint
         self.intervalStepSize = intervalStepSize
         self.intervalMaxSteps = intervalMaxSteps
         self.rootTolerance = rootTolerance
         self.rootFindingMaximumIterations = rootFindingMaximumIterations
+        # float32 interval scans are opt-in: they are faster but can miss
+        # roots whose sign changes do not survive float32 rounding
+        self.scanFloat32MinStepSize = scanFloat32MinStepSize
     
-    def findIntervals(self, func: Callable[[float],float]) -> list[Interval]:
-        value:float = self.intervalStartPoint
-        intervals: list[Interval] = []
-
-        for _ in range(self.intervalMaxSteps):
-            nextValue:float = value + self.intervalStepSize
-            lowResult: float = func(value)
-            highResult: float = func(nextValue)
-            if lowResult * highResult < 0:
-                intervals.append(Interval(low=value, high=nextValue))
-            value = nextValue
-        return intervals
-
-
-    def _findRootInInterval(self, func: Callable[[float],float], interval: Interval) -> BisectionRoot | None:
-        a = interval.low
-        b = interval.high
-        x1 = (a + b) / 2.0
-        startTime = time.perf_counter()
-        for i in range(self.rootFindingMaximumIterations):
-            x1 = (a + b) / 2.0
-            f1 = func(x1)
-            if f1 > 0:
-                b = x1
-            else:
-                a = x1
-            if abs(b-a) < self.rootTolerance:
-                endTime = time.perf_counter()
-                return BisectionRoot(root=x1, iterations=i+1, error=abs(b-a), time=endTime - startTime)
-        return None
+    def findIntervals(self, func: Callable[[float],float]) -> tuple[np.ndarray, np.ndarray]:
+        return scanSignChanges(func, self.intervalStartPoint, self.intervalStepSize, self.intervalMaxSteps, self.scanFloat32MinStepSize)
+
+
+    def _findRootsInIntervals(self, batch: Callable[[np.ndarray, np.ndarray, float, int], tuple[np.ndarray, np.ndarray, np.ndarray]], lows: np.ndarray, highs: np.ndarray) -> BisectionResultArrays:
+        lows = np.ascontiguousarray(lows, dtype=np.float64)
+        highs = np.ascontiguousarray(highs, dtype=np.float64)
+        # a negative intervalStepSize scans right to left, so each bracket is
+        # ordered before it is bisected
+        left = np.minimum(lows, highs)
+        right = np.maximum(lows, highs)
+        startTime = time.perf_counter_ns()
+        roots, iterations, errors = batch(left, right, float(self.rootTolerance), int(self.rootFindingMaximumIterations))
+        endTime = time.perf_counter_ns()
+        # the intervals are solved together, so each root gets the mean time
+        times = np.full(lows.size, (endTime - startTime) * 1e-9 / lows.size)
+        converged = iterations >= 0
+        return BisectionResultArrays(lows=lows[converged], highs=highs[converged], roots=roots[converged], iterations=iterations[converged], errors=errors[converged], times=times[converged])
     
-    def findRoots(self, func: Callable[[float],float]) -> list[BisectionResult] | None:
-        intervals = self.findIntervals(func)
-        if not intervals:
+    def findRoots(self, func: Callable[[float],float], intervals: tuple[np.ndarray, np.ndarray] | None = None) -> BisectionResultArrays | None:
+        lows, highs = self.findIntervals(func) if intervals is None else intervals
+        if lows.size == 0:
             return None
-        roots: list[BisectionResult] = []
-        for interval in intervals:
-            root = self._findRootInInterval(func, interval)
-            if root is not None:
-                roots.append(BisectionResult(interval=interval, root=root))
-        return roots
+        return self._findRootsInIntervals(makeBisectBatchKernel(func), lows, highs)
     
-    def printBisectionResults(self, roots: list[BisectionResult]):
-        tableData = []
-        for result in roots:
-            tableData.append([f"[{result.interval.low}, {result.interval.high}]", result.root.root, result.root.iterations, result.root.error, result.root.time * 1000])
+    def printBisectionResults(self, roots: BisectionResultArrays):
+        # rows are streamed straight from the result arrays into tabulate
+        tableData = ([f"[{low}, {high}]", root, iterations, error, elapsed * 1000] for low, high, root, iterations, error, elapsed in zip(roots.lows.tolist(), roots.highs.tolist(), roots.roots.tolist(), roots.iterations.tolist(), roots.errors.tolist(), roots.times.tolist()))
         print(tabulate(tableData, headers=["Interval", "Root (x)", "Iterations", "Error", "Time (milliseconds)"]))
 
-    def printRoots(self,root: list[BisectionRoot]):
-        tableData = []
-        for result in root:
-            tableData.append([result.root, result.iterations, result.error, result.time * 1000])
-        print(tabulate(tableData, headers=["Root (x)", "Iterations", "Error", "Time (milliseconds)"]))
+    def printRoots(self, roots: BisectionResultArrays):
+        # one tolist() call converts every row at C level
+        print(tabulate(roots.toRecords().tolist(), headers=["Root (x)", "Iterations", "Error", "Time (milliseconds)"]))
+
+    def dumpRoots(self, roots: BisectionResultArrays, file=None):
+        dumpRecords(roots.toRecords(), file)
         
 
 
 # Test interval finding
 if __name__ == "__main__":
     def testFunc(x: float) -> float:
-        # return x**2 - 5*x - 2
-        # return x**4 + 10*x**2 - 5*x - 2
-        # return 20*x**6 + 10*x**4 -5*x**3 + 10*x**2 + 5*x - 40
-        # return math.sin(x) * 10 + x**2 -20
-        # return math.pow(math.sin(5*x),2) * 10 + x**2 -4
-        # return x**3 - 6*x**2 + 11*x - 6
+        # Polynomials are written in Horner form with explicit multiplies:
+        # x*x is far cheaper than x**2 or math.pow inside the root-finding loops.
+        # return (x - 5.0)*x - 2.0
+        # return ((x*x + 10.0)*x - 5.0)*x - 2.0
+        # return ((((20.0*x*x + 10.0)*x - 5.0)*x + 10.0)*x + 5.0)*x - 40.0
+        # return 10.0*math.sin(x) + x*x - 20.0
+        # return 5.0*(1.0 - math.cos(10*x)) + x*x - 4.0
+        # return ((x - 6.0)*x + 11.0)*x - 6.0
         # return math.cos(x) - x
-        return math.e**x - 3*x**2
+        return math.e**x - 3.0*x*x
 
     
     bisectionFinder = BisectionRootFinder(intervalStartPoint=-20, intervalStepSize=0.1, intervalMaxSteps=400, rootTolerance=1e-7, rootFindingMaximumIterations=10000000)
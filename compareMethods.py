@@ -0,0 +1,33 @@
+import math
+from intervalScan import scanSignChanges
+from bisection import BisectionRootFinder
+from newtonRaphson import NewtonRaphsonRootFinder
+from secant import SecantRootFinder
+
+
+# Compare the three methods on one function. The interval scan runs once and
+# its (lows, highs) arrays are passed to every finder.
+if __name__ == "__main__":
+    def func(x: float) -> float:
+        return math.exp(x) - 3.0*x*x
+
+    def derivativeFunc(x: float) -> float:
+        return math.exp(x) - 6.0*x
+
+    settings = dict(intervalStartPoint=-20, intervalStepSize=0.1, intervalMaxSteps=400, rootTolerance=1e-7, rootFindingMaximumIterations=10000000)
+    intervals = scanSignChanges(func, settings["intervalStartPoint"], settings["intervalStepSize"], settings["intervalMaxSteps"])
+    if intervals[0].size == 0:
+        print("No roots found in the specified intervals.")
+        exit(1)
+
+    bisectionFinder = BisectionRootFinder(**settings)
+    print("Bisection")
+    bisectionFinder.printBisectionResults(bisectionFinder.findRoots(func, intervals=intervals))
+
+    newtonRaphsonFinder = NewtonRaphsonRootFinder(**settings)
+    print("\nNewton-Raphson")
+    newtonRaphsonFinder.printNewtonRaphsonResults(newtonRaphsonFinder.findRoots(func, derivativeFunc, intervals=intervals))
+
+    secantFinder = SecantRootFinder(**settings)
+    print("\nSecant")
+    secantFinder.printSecantResults(secantFinder.findRoots(func, intervals=intervals))
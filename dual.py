@@ -0,0 +1,87 @@
+import math
+import numpy as np
+
+
+class Dual:
+    # v + d*eps with eps**2 == 0: evaluating f(Dual(x, 1.0)) carries f(x) in
+    # v and f'(x) in d, exact to machine precision.
+    __slots__ = ('v', 'd')
+
+    def __init__(self, v: float, d: float = 0.0):
+        self.v = v
+        self.d = d
+
+    def __add__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.v + other.v, self.d + other.d)
+        return Dual(self.v + other, self.d)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.v - other.v, self.d - other.d)
+        return Dual(self.v - other, self.d)
+
+    def __rsub__(self, other):
+        return Dual(other - self.v, -self.d)
+
+    def __neg__(self):
+        return Dual(-self.v, -self.d)
+
+    def __mul__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.v * other.v, self.d * other.v + self.v * other.d)
+        return Dual(self.v * other, self.d * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.v / other.v, (self.d * other.v - self.v * other.d) / (other.v * other.v))
+        return Dual(self.v / other, self.d / other)
+
+    def __rtruediv__(self, other):
+        return Dual(other / self.v, -other * self.d / (self.v * self.v))
+
+    def __pow__(self, other):
+        if isinstance(other, Dual):
+            value = self.v ** other.v
+            return Dual(value, value * (other.d * math.log(self.v) + other.v * self.d / self.v))
+        return Dual(self.v ** other, other * self.v ** (other - 1) * self.d)
+
+    def __rpow__(self, other):
+        value = other ** self.v
+        return Dual(value, value * math.log(other) * self.d)
+
+    # math is used for scalar values (the Newton iterations); numpy lets a
+    # Dual wrap a whole scan grid at once
+
+    def exp(self):
+        value = math.exp(self.v) if isinstance(self.v, float) else np.exp(self.v)
+        return Dual(value, value * self.d)
+
+    def sin(self):
+        if isinstance(self.v, float):
+            return Dual(math.sin(self.v), math.cos(self.v) * self.d)
+        return Dual(np.sin(self.v), np.cos(self.v) * self.d)
+
+    def cos(self):
+        if isinstance(self.v, float):
+            return Dual(math.cos(self.v), -math.sin(self.v) * self.d)
+        return Dual(np.cos(self.v), -np.sin(self.v) * self.d)
+
+
+# Drop-in replacements for math.exp/sin/cos that also accept Dual numbers.
+# Plain floats and arrays go through numpy, so the same function can be
+# used by the vectorized interval scan.
+def exp(x):
+    return x.exp() if isinstance(x, Dual) else np.exp(x)
+
+
+def sin(x):
+    return x.sin() if isinstance(x, Dual) else np.sin(x)
+
+
+def cos(x):
+    return x.cos() if isinstance(x, Dual) else np.cos(x)
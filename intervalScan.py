@@ -0,0 +1,164 @@
+from typing import Callable
+import functools
+import math
+import sys
+import numpy as np
+from numba import njit, prange, types
+from numba.core.dispatcher import Dispatcher
+from numba.core.errors import NumbaError
+
+
+def evaluateOnGrid(func: Callable[[float],float], xs: np.ndarray) -> np.ndarray:
+    # func is called once with the whole grid when it is written with plain
+    # arithmetic / numpy ufuncs; functions using the math module or scalar
+    # branches only accept floats, so those fall back to np.vectorize.
+    try:
+        ys = np.asarray(func(xs), dtype=xs.dtype)
+    except (TypeError, ValueError):
+        ys = None
+    if ys is None or ys.shape != xs.shape:
+        ys = np.vectorize(func, otypes=[xs.dtype])(xs)
+    return ys
+
+
+def _findSignChanges(func: Callable[[float],float], startPoint: float, stepSize: float, maxSteps: int, float32MinStepSize: float) -> tuple[np.ndarray, np.ndarray]:
+    xs = startPoint + np.arange(maxSteps + 1) * stepSize
+    # Opt-in: with stepSize >= float32MinStepSize the grid is evaluated in
+    # float32 (half the memory traffic, twice the SIMD lanes) as long as
+    # float32 can still tell neighbouring grid points apart. This can miss
+    # roots when func's sign does not survive float32 rounding (e.g.
+    # near-double roots), so the default of math.inf keeps float64. The
+    # returned endpoints always come from the float64 grid.
+    largestX = max(abs(xs[0]), abs(xs[-1]))
+    if stepSize >= float32MinStepSize and np.spacing(np.float32(largestX)) < stepSize:
+        ys = evaluateOnGrid(func, xs.astype(np.float32))
+    else:
+        ys = evaluateOnGrid(func, xs)
+    # compare sign bits rather than multiplying neighbours, which can
+    # overflow to inf; zeros and NaNs never count as a sign change
+    signs = np.signbit(ys)
+    valid = (ys != 0.0) & ~np.isnan(ys)
+    indices = np.flatnonzero((signs[:-1] != signs[1:]) & valid[:-1] & valid[1:])
+    return xs[indices], xs[indices + 1]
+
+
+# Keyed on the function object itself rather than id(func): holding the
+# reference means a collected function's id can never be reused to return
+# another function's intervals.
+_cachedFindSignChanges = functools.lru_cache(maxsize=32)(_findSignChanges)
+
+
+def scanSignChanges(func: Callable[[float],float], startPoint: float, stepSize: float, maxSteps: int, float32MinStepSize: float = math.inf) -> tuple[np.ndarray, np.ndarray]:
+    try:
+        lows, highs = _cachedFindSignChanges(func, startPoint, stepSize, maxSteps, float32MinStepSize)
+    except TypeError:
+        # unhashable callables are scanned every time
+        return _findSignChanges(func, startPoint, stepSize, maxSteps, float32MinStepSize)
+    # callers get their own copies so the cached arrays stay intact
+    return lows.copy(), highs.copy()
+
+
+# lru_caches created by memoizePerFunction, cleared with the scan cache
+_functionCaches: list = []
+
+
+def memoizePerFunction(factory: Callable) -> Callable:
+    # Memoizes a kernel factory on the user callables it is given, the same
+    # way scanSignChanges memoizes scans. Unhashable callables get a new
+    # kernel on every call.
+    cached = functools.lru_cache(maxsize=32)(factory)
+    _functionCaches.append(cached)
+
+    @functools.wraps(factory)
+    def build(*functions):
+        try:
+            hash(functions)
+        except TypeError:
+            return factory(*functions)
+        return cached(*functions)
+    return build
+
+
+def invalidateCache():
+    # also drops the memoized kernels, which hold references to the user
+    # functions just like the scan cache does
+    _cachedFindSignChanges.cache_clear()
+    for cache in _functionCaches:
+        cache.cache_clear()
+
+
+# Kernels return (root, iterations, error), with iterations == -1 for a
+# start that did not converge. Bracket kernels take (low, high, tol,
+# maxIterations); start-point kernels take (x0, tol, maxIterations).
+bracketKernelSignature = types.Tuple((types.float64, types.int64, types.float64))(types.float64, types.float64, types.float64, types.int64)
+startPointKernelSignature = types.Tuple((types.float64, types.int64, types.float64))(types.float64, types.float64, types.int64)
+_bracketBatchSignature = types.Tuple((types.float64[::1], types.int32[::1], types.float64[::1]))(types.float64[::1], types.float64[::1], types.float64, types.int64)
+_startPointBatchSignature = types.Tuple((types.float64[::1], types.int32[::1], types.float64[::1]))(types.float64[::1], types.float64, types.int64)
+
+
+def compileKernel(makeKernel: Callable, functions: tuple, signature) -> Callable:
+    # makeKernel captures the user callables at generation time so numba can
+    # inline them into the loop. The kernel is compiled from its signature,
+    # so the callables are never run outside the scanned intervals.
+    # Callables numba cannot compile (njit raises TypeError for
+    # non-functions such as math.cos or partials) keep the same loop in
+    # Python. error_model='numpy' turns a division by zero into inf/nan
+    # instead of an exception, which would abort the whole prange batch.
+    try:
+        jitFunctions = [function if isinstance(function, Dispatcher) else njit(function, error_model='numpy') for function in functions]
+        return njit(signature, fastmath=True, error_model='numpy')(makeKernel(*jitFunctions))
+    except (NumbaError, TypeError):
+        return makeKernel(*functions)
+
+
+def _bracketBatch(kernel: Callable[[float, float, float, int], tuple[float, int, float]]) -> Callable[[np.ndarray, np.ndarray, float, int], tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    def batch(lows: np.ndarray, highs: np.ndarray, tol: float, maxIterations: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n = lows.size
+        roots = np.empty(n, dtype=np.float64)
+        iterations = np.empty(n, dtype=np.int32)
+        errors = np.empty(n, dtype=np.float64)
+        for k in prange(n):
+            roots[k], iterations[k], errors[k] = kernel(lows[k], highs[k], tol, maxIterations)
+        return roots, iterations, errors
+    return batch
+
+
+def _startPointBatch(kernel: Callable[[float, float, int], tuple[float, int, float]]) -> Callable[[np.ndarray, float, int], tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    def batch(startPoints: np.ndarray, tol: float, maxIterations: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n = startPoints.size
+        roots = np.empty(n, dtype=np.float64)
+        iterations = np.empty(n, dtype=np.int32)
+        errors = np.empty(n, dtype=np.float64)
+        for k in prange(n):
+            roots[k], iterations[k], errors[k] = kernel(startPoints[k], tol, maxIterations)
+        return roots, iterations, errors
+    return batch
+
+
+def _compileBatch(batch: Callable, kernel: Callable, signature, emptyArguments: tuple) -> Callable:
+    # Starts are independent, so a compiled kernel is run over all of them
+    # at once with prange. The Python fallback runs them in order.
+    if not isinstance(kernel, Dispatcher):
+        return batch
+    compiled = njit(signature, parallel=True, fastmath=True)(batch)
+    # an empty batch starts numba's thread pool outside the timed call
+    # without evaluating the user callables anywhere
+    compiled(*emptyArguments)
+    return compiled
+
+
+def compileBracketBatch(kernel: Callable[[float, float, float, int], tuple[float, int, float]]) -> Callable[[np.ndarray, np.ndarray, float, int], tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    return _compileBatch(_bracketBatch(kernel), kernel, _bracketBatchSignature, (np.empty(0), np.empty(0), 1e-7, 1))
+
+
+def compileStartPointBatch(kernel: Callable[[float, float, int], tuple[float, int, float]]) -> Callable[[np.ndarray, float, int], tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    return _compileBatch(_startPointBatch(kernel), kernel, _startPointBatchSignature, (np.empty(0), 1e-7, 1))
+
+
+def resultRecords(roots: np.ndarray, iterations: np.ndarray, errors: np.ndarray, times: np.ndarray) -> np.recarray:
+    return np.rec.fromarrays([roots, iterations, errors, times * 1000], names='root,iterations,error,timeMs')
+
+
+def dumpRecords(records: np.recarray, file=None):
+    # plain-text dump for large result sets, formatted by np.savetxt
+    np.savetxt(sys.stdout if file is None else file, records, fmt='%.9g %d %.3e %.6g', header='root iterations error time_ms')
@@ -1,108 +1,258 @@
 import dataclasses
 import math
-from typing import Callable
+from typing import Callable, Literal
 import time
 from tabulate import tabulate
+import numpy as np
+from intervalScan import compileKernel, compileStartPointBatch, dumpRecords, memoizePerFunction, resultRecords, scanSignChanges, startPointKernelSignature
+from dual import Dual
+import dual
 from math import pow, sin
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class Interval:
     low: float
     high: float
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class NewtonRaphsonRoot:
     root: float
     iterations: int
     error: float
     time: float = 0.0
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class NewtonRaphsonResult:
     root: NewtonRaphsonRoot
 
+
+@dataclasses.dataclass
+class NewtonRaphsonResultArrays:
+    roots: np.ndarray
+    iterations: np.ndarray
+    errors: np.ndarray
+    times: np.ndarray
+
+    def __len__(self) -> int:
+        return self.roots.size
+
+    def toRecords(self) -> np.recarray:
+        return resultRecords(self.roots, self.iterations, self.errors, self.times)
+
+
+def _newtonKernel(func: Callable[[float],float], derivativeFunc: Callable[[float],float]) -> Callable[[float, float, int], tuple[float, int, float]]:
+    def kernel(x0: float, tol: float, maxIterations: int) -> tuple[float, int, float]:
+        for i in range(maxIterations):
+            f = func(x0)
+            fp = derivativeFunc(x0)
+            # a flat derivative has no Newton step; the start is dropped
+            # like any other that does not converge
+            if fp == 0.0:
+                break
+            x1 = x0 - (f / fp)
+            # an overflowed step would pass the relative test (inf <= inf)
+            if not math.isfinite(x1):
+                break
+            # the step test is relative for large |x1|, and a residual that
+            # is already within tol stops the iteration as well
+            if abs(x1 - x0) <= tol * (abs(x1) + 1.0) or abs(f) <= tol:
+                return x1, i + 1, abs(x1 - x0)
+            x0 = x1
+        # iterations == -1 marks a start point that did not converge
+        return x0, -1, 0.0
+    return kernel
+
+
+def makeNewtonKernel(func: Callable[[float],float], derivativeFunc: Callable[[float],float]) -> Callable[[float, float, int], tuple[float, int, float]]:
+    return compileKernel(_newtonKernel, (func, derivativeFunc), startPointKernelSignature)
+
+
+def _newtonFdfKernel(fdf: Callable[[float],tuple[float,float]]) -> Callable[[float, float, int], tuple[float, int, float]]:
+    def kernel(x0: float, tol: float, maxIterations: int) -> tuple[float, int, float]:
+        for i in range(maxIterations):
+            f, fp = fdf(x0)
+            if fp == 0.0:
+                break
+            x1 = x0 - (f / fp)
+            if not math.isfinite(x1):
+                break
+            if abs(x1 - x0) <= tol * (abs(x1) + 1.0) or abs(f) <= tol:
+                return x1, i + 1, abs(x1 - x0)
+            x0 = x1
+        # iterations == -1 marks a start point that did not converge
+        return x0, -1, 0.0
+    return kernel
+
+
+def makeNewtonFdfKernel(fdf: Callable[[float],tuple[float,float]]) -> Callable[[float, float, int], tuple[float, int, float]]:
+    # Same as makeNewtonKernel, but f and f' come from a single call so
+    # subexpressions shared by both (e.g. exp(x)) are evaluated once.
+    return compileKernel(_newtonFdfKernel, (fdf,), startPointKernelSignature)
+
+
+# Batches are memoized per function, so repeated findRoots calls on the same
+# function skip the JIT compile.
+@memoizePerFunction
+def makeNewtonBatchKernel(func: Callable[[float],float], derivativeFunc: Callable[[float],float]) -> Callable[[np.ndarray, float, int], tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    return compileStartPointBatch(makeNewtonKernel(func, derivativeFunc))
+
+
+@memoizePerFunction
+def makeNewtonFdfBatchKernel(fdf: Callable[[float],tuple[float,float]]) -> Callable[[np.ndarray, float, int], tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    return compileStartPointBatch(makeNewtonFdfKernel(fdf))
+
+
+@memoizePerFunction
+def _fdfValue(fdf: Callable[[float],tuple[float,float]]) -> Callable[[float],float]:
+    # one wrapper per fdf, so repeated scans hit the interval scan cache
+    def func(x: float) -> float:
+        return fdf(x)[0]
+    return func
+
+
+@memoizePerFunction
+def _dualValue(func: Callable[[Dual],Dual]) -> Callable[[float],float]:
+    # scans call func with Dual values too, so functions written against
+    # the Dual API (x.exp(), dual.sin(x), ...) scan the same way they solve
+    def value(x: float) -> float:
+        return func(Dual(x, 0.0)).v
+    return value
+
+
+def _dualFdf(func: Callable[[Dual],Dual]) -> Callable[[float],tuple[float,float]]:
+    def fdf(x: float) -> tuple[float, float]:
+        y = func(Dual(x, 1.0))
+        return y.v, y.d
+    return fdf
+
+
+@memoizePerFunction
+def makeNewtonAutodiffBatchKernel(func: Callable[[Dual],Dual]) -> Callable[[np.ndarray, float, int], tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    # numba cannot compile the Dual class, so this loop always runs in Python
+    return compileStartPointBatch(_newtonFdfKernel(_dualFdf(func)))
+
+
 class NewtonRaphsonRootFinder:
-    def __init__(self, intervalStartPoint:float = 0.0, intervalStepSize:float = 1.0, intervalMaxSteps:int = 1000, rootTolerance:float = 1e-7, rootFindingMaximumIterations:int = 1000):
+    def __init__(self, intervalStartPoint:float = 0.0, intervalStepSize:float = 1.0, intervalMaxSteps:int = 1000, rootTolerance:float = 1e-7, rootFindingMaximumIterations:int = 1000, initialGuess:Literal['midpoint', 'high', 'low'] = 'high', scanFloat32MinStepSize:float = math.inf):
+        if initialGuess not in ('midpoint', 'high', 'low'):
+            raise ValueError(f"initialGuess must be 'midpoint', 'high' or 'low', not {initialGuess!r}")
         self.intervalStartPoint = intervalStartPoint
         self.intervalStepSize = intervalStepSize
         self.intervalMaxSteps = intervalMaxSteps
         self.rootTolerance = rootTolerance
         self.rootFindingMaximumIterations = rootFindingMaximumIterations
+        self.initialGuess = initialGuess
+        # float32 interval scans are opt-in: they are faster but can miss
+        # roots whose sign changes do not survive float32 rounding
+        self.scanFloat32MinStepSize = scanFloat32MinStepSize
     
-    def findIntervals(self, func: Callable[[float],float]) -> list[Interval]:
-        value:float = self.intervalStartPoint
-        intervals: list[Interval] = []
-
-        for _ in range(self.intervalMaxSteps):
-            nextValue:float = value + self.intervalStepSize
-            lowResult: float = func(value)
-            highResult: float = func(nextValue)
-            if lowResult * highResult < 0:
-                intervals.append(Interval(low=value, high=nextValue))
-            value = nextValue
-        return intervals
+    def findIntervals(self, func: Callable[[float],float]) -> tuple[np.ndarray, np.ndarray]:
+        return scanSignChanges(func, self.intervalStartPoint, self.intervalStepSize, self.intervalMaxSteps, self.scanFloat32MinStepSize)
     
-    def _findRootInInterval(self, func: Callable[[float],float], derivativeFunc: Callable[[float],float], interval: Interval) -> NewtonRaphsonRoot | None:
-        x0 =  interval.high
-        startTime = time.perf_counter()
-        for i in range(self.rootFindingMaximumIterations):
-            x1 = x0 - (func(x0) / derivativeFunc(x0))
-            if abs(x1 - x0) < self.rootTolerance:
-                endTime = time.perf_counter()
-                return NewtonRaphsonRoot(root=x1, iterations=i+1, error=abs(x1 - x0), time=endTime - startTime)
-            x0 = x1
-        return None
+    def _findRootsInIntervals(self, batch: Callable[[np.ndarray, float, int], tuple[np.ndarray, np.ndarray, np.ndarray]], lows: np.ndarray, highs: np.ndarray) -> NewtonRaphsonResultArrays:
+        lows = np.ascontiguousarray(lows, dtype=np.float64)
+        highs = np.ascontiguousarray(highs, dtype=np.float64)
+        # 'high' is the original start point; 'midpoint' and 'low' are opt-in
+        if self.initialGuess == 'midpoint':
+            startPoints = (lows + highs) * 0.5
+        elif self.initialGuess == 'low':
+            startPoints = lows
+        else:
+            startPoints = highs
+        startTime = time.perf_counter_ns()
+        roots, iterations, errors = batch(startPoints, float(self.rootTolerance), int(self.rootFindingMaximumIterations))
+        endTime = time.perf_counter_ns()
+        # the intervals are solved together, so each root gets the mean time
+        times = np.full(lows.size, (endTime - startTime) * 1e-9 / lows.size)
+        converged = iterations >= 0
+        return NewtonRaphsonResultArrays(roots=roots[converged], iterations=iterations[converged], errors=errors[converged], times=times[converged])
     
-    def findRoots(self, func: Callable[[float],float], derivativeFunc: Callable[[float],float]) -> list[NewtonRaphsonResult] | None:
-        intervals = self.findIntervals(func)
-        if not intervals:
+    def findRoots(self, func: Callable[[float],float], derivativeFunc: Callable[[float],float], intervals: tuple[np.ndarray, np.ndarray] | None = None) -> NewtonRaphsonResultArrays | None:
+        lows, highs = self.findIntervals(func) if intervals is None else intervals
+        if lows.size == 0:
+            return None
+        
+        return self._findRootsInIntervals(makeNewtonBatchKernel(func, derivativeFunc), lows, highs)
+
+    def findRootsFdf(self, fdf: Callable[[float],tuple[float,float]], intervals: tuple[np.ndarray, np.ndarray] | None = None) -> NewtonRaphsonResultArrays | None:
+        lows, highs = self.findIntervals(_fdfValue(fdf)) if intervals is None else intervals
+        if lows.size == 0:
+            return None
+        
+        return self._findRootsInIntervals(makeNewtonFdfBatchKernel(fdf), lows, highs)
+
+    def findRootsAutodiff(self, func: Callable[[Dual],Dual], intervals: tuple[np.ndarray, np.ndarray] | None = None) -> NewtonRaphsonResultArrays | None:
+        lows, highs = self.findIntervals(_dualValue(func)) if intervals is None else intervals
+        if lows.size == 0:
             return None
         
-        results: list[NewtonRaphsonResult] = []
-        for interval in intervals:
-            root = self._findRootInInterval(func, derivativeFunc, interval)
-            if root is not None:
-                results.append(NewtonRaphsonResult(root=root))
-        return results
-
-    def printNewtonRaphsonResults(self, roots: list[NewtonRaphsonResult]):
-        tableData = []
-        for result in roots:
-            tableData.append([result.root.root, result.root.iterations, result.root.error, result.root.time * 1000])
+        return self._findRootsInIntervals(makeNewtonAutodiffBatchKernel(func), lows, highs)
+
+    def printNewtonRaphsonResults(self, roots: NewtonRaphsonResultArrays):
+        # rows are streamed straight from the result arrays into tabulate
+        tableData = ([root, iterations, error, elapsed * 1000] for root, iterations, error, elapsed in zip(roots.roots.tolist(), roots.iterations.tolist(), roots.errors.tolist(), roots.times.tolist()))
         print(tabulate(tableData, headers=["Root (x)", "Iterations", "Error", "Time (milliseconds)"]))
     
-    def printRoots(self,root: list[NewtonRaphsonRoot]):
-        tableData = []
-        for result in root:
-            tableData.append([result.root, result.iterations, result.error, result.time * 1000])
-        print(tabulate(tableData, headers=["Root (x)", "Iterations", "Error", "Time (milliseconds)"]))
+    def printRoots(self, roots: NewtonRaphsonResultArrays):
+        # one tolist() call converts every row at C level
+        print(tabulate(roots.toRecords().tolist(), headers=["Root (x)", "Iterations", "Error", "Time (milliseconds)"]))
+
+    def dumpRoots(self, roots: NewtonRaphsonResultArrays, file=None):
+        dumpRecords(roots.toRecords(), file)
 
 if __name__ == "__main__":
     # Example usage
     def func(x: float) -> float:
-        # return x**2 - 5*x - 2
-        # return x**4 + 10*x**2 - 5*x - 2
-        # return 20*x**6 + 10*x**4 -5*x**3 + 10*x**2 + 5*x - 40
-        # return math.sin(x) * 10 + x**2 -20
-        # return math.pow(math.sin(5*x),2) * 10 + x**2 -4
-        # return x**3 - 6*x**2 + 11*x - 6
+        # Polynomials are written in Horner form with explicit multiplies:
+        # x*x is far cheaper than x**2 or math.pow inside the root-finding loops.
+        # return (x - 5.0)*x - 2.0
+        # return ((x*x + 10.0)*x - 5.0)*x - 2.0
+        # return ((((20.0*x*x + 10.0)*x - 5.0)*x + 10.0)*x + 5.0)*x - 40.0
+        # return 10.0*math.sin(x) + x*x - 20.0
+        # return 5.0*(1.0 - math.cos(10*x)) + x*x - 4.0
+        # return ((x - 6.0)*x + 11.0)*x - 6.0
         # return math.cos(x) - x
-        return math.e**x - 3*x**2
+        return math.exp(x) - 3.0*x*x
 
     def derivativeFunc(x: float) -> float:
-        # return 2*x - 5
-        # return 4*x**3 + 20*x - 5
-        # return 120*x**5 + 40*x**3 -15*x**2 + 20*x + 5
+        # return 2.0*x - 5.0
+        # return (4.0*x*x + 20.0)*x - 5.0
+        # return (((120.0*x*x + 40.0)*x - 15.0)*x + 20.0)*x + 5.0
         # return 10*math.cos(x) + 2*x
-        # return 100*math.sin(5*x)*math.cos(5*x) + 2*x
-        # return 3*x**2 - 12*x + 11
+        # return 50.0*math.sin(10*x) + 2.0*x
+        # return (3.0*x - 12.0)*x + 11.0
         # return -math.sin(x) - 1
-        return math.e**x - 6*x
+        return math.exp(x) - 6.0*x
+
+    # f and f' in one call: shared work such as exp(x) is done once per
+    # iteration. Use with rootFinder.findRootsFdf(fdf).
+    def fdf(x: float) -> tuple[float, float]:
+        e = math.exp(x)
+        return e - 3.0*x*x, e - 6.0*x
+
+    # f' derived automatically with dual numbers: use dual.exp/sin/cos in
+    # place of the math versions. Use with rootFinder.findRootsAutodiff(funcAutodiff).
+    def funcAutodiff(x):
+        return dual.exp(x) - 3.0*x*x
         
 
     rootFinder = NewtonRaphsonRootFinder(intervalStartPoint=-20, intervalStepSize=0.1, intervalMaxSteps=400, rootTolerance=1e-7, rootFindingMaximumIterations=10000000)
     roots = rootFinder.findRoots(func, derivativeFunc)
+    if roots:
+        rootFinder.printNewtonRaphsonResults(roots)
+    else:
+        print("No roots found in the specified intervals.")
+
+    print()
+    roots = rootFinder.findRootsFdf(fdf)
+    if roots:
+        rootFinder.printNewtonRaphsonResults(roots)
+    else:
+        print("No roots found in the specified intervals.")
+
+    print()
+    roots = rootFinder.findRootsAutodiff(funcAutodiff)
     if roots:
         rootFinder.printNewtonRaphsonResults(roots)
     else:
@@ -3,97 +3,138 @@ import math
 from typing import Callable
 import time
 from tabulate import tabulate
+import numpy as np
+from intervalScan import bracketKernelSignature, compileKernel, compileBracketBatch, dumpRecords, memoizePerFunction, resultRecords, scanSignChanges
 from math import pow, sin
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class Interval:
     low: float
     high: float
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class SecantRoot:
     root: float
     iterations: int
     error: float
     time: float = 0.0
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class SecantRaphsonResult:
     interval: Interval
     root: SecantRoot
 
+
+@dataclasses.dataclass
+class SecantRaphsonResultArrays:
+    lows: np.ndarray
+    highs: np.ndarray
+    roots: np.ndarray
+    iterations: np.ndarray
+    errors: np.ndarray
+    times: np.ndarray
+
+    def __len__(self) -> int:
+        return self.roots.size
+
+    def toRecords(self) -> np.recarray:
+        return resultRecords(self.roots, self.iterations, self.errors, self.times)
+
+
+def _secantKernel(func: Callable[[float],float]) -> Callable[[float, float, float, int], tuple[float, int, float]]:
+    def kernel(x0: float, x1: float, tol: float, maxIterations: int) -> tuple[float, int, float]:
+        # f(x1) is carried over as the next f(x0), so each iteration only
+        # evaluates func once
+        f0 = func(x0)
+        f1 = func(x1)
+        for i in range(maxIterations):
+            if f1 == f0:
+                break
+            x2 = x1 - (f1 * (x1 - x0) / (f1 - f0))
+            # an overflowed step would pass the relative test (inf <= inf)
+            if not math.isfinite(x2):
+                break
+            # the step test is relative for large |x2|, and a residual that
+            # is already within tol stops the iteration as well
+            if abs(x2 - x1) <= tol * (abs(x2) + 1.0) or abs(f1) <= tol:
+                return x2, i + 1, abs(x2 - x1)
+            x0, f0 = x1, f1
+            x1 = x2
+            f1 = func(x1)
+        # iterations == -1 marks an interval that did not converge
+        return x1, -1, 0.0
+    return kernel
+
+
+def makeSecantKernel(func: Callable[[float],float]) -> Callable[[float, float, float, int], tuple[float, int, float]]:
+    return compileKernel(_secantKernel, (func,), bracketKernelSignature)
+
+
+@memoizePerFunction
+def makeSecantBatchKernel(func: Callable[[float],float]) -> Callable[[np.ndarray, np.ndarray, float, int], tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    # Batches are memoized per function, so repeated findRoots calls on the
+    # same function skip the JIT compile.
+    return compileBracketBatch(makeSecantKernel(func))
+
+
 class SecantRootFinder:
-    def __init__(self, intervalStartPoint:float = 0.0, intervalStepSize:float = 1.0, intervalMaxSteps:int = 1000, rootTolerance:float = 1e-7, rootFindingMaximumIterations:int = 1000):
+    def __init__(self, intervalStartPoint:float = 0.0, intervalStepSize:float = 1.0, intervalMaxSteps:int = 1000, rootTolerance:float = 1e-7, rootFindingMaximumIterations:int = 1000, scanFloat32MinStepSize:float = math.inf):
         self.intervalStartPoint = intervalStartPoint
         self.intervalStepSize = intervalStepSize
         self.intervalMaxSteps = intervalMaxSteps
         self.rootTolerance = rootTolerance
         self.rootFindingMaximumIterations = rootFindingMaximumIterations
+        # float32 interval scans are opt-in: they are faster but can miss
+        # roots whose sign changes do not survive float32 rounding
+        self.scanFloat32MinStepSize = scanFloat32MinStepSize
     
-    def findIntervals(self, func: Callable[[float],float]) -> list[Interval]:
-        value:float = self.intervalStartPoint
-        intervals: list[Interval] = []
-
-        for _ in range(self.intervalMaxSteps):
-            nextValue:float = value + self.intervalStepSize
-            lowResult: float = func(value)
-            highResult: float = func(nextValue)
-            if lowResult * highResult < 0:
-                intervals.append(Interval(low=value, high=nextValue))
-            value = nextValue
-        return intervals
+    def findIntervals(self, func: Callable[[float],float]) -> tuple[np.ndarray, np.ndarray]:
+        return scanSignChanges(func, self.intervalStartPoint, self.intervalStepSize, self.intervalMaxSteps, self.scanFloat32MinStepSize)
     
-    def _findRootInInterval(self, func: Callable[[float],float], interval: Interval) -> SecantRoot | None:
-        x0 = interval.low
-        x1 = interval.high
-        startTime = time.perf_counter()
-        for i in range(self.rootFindingMaximumIterations):
-            if func(x1) - func(x0) == 0:
-                return None
-            x2 = x1 - (func(x1)* (x1 - x0) / (func(x1) - func(x0)))
-            if abs(x2 - x1) < self.rootTolerance:
-                endTime = time.perf_counter()
-                return SecantRoot(root=x2, iterations=i+1, error=abs(x2 - x1), time=endTime - startTime)
-            x0 = x1
-            x1 = x2
-        return None
+    def _findRootsInIntervals(self, batch: Callable[[np.ndarray, np.ndarray, float, int], tuple[np.ndarray, np.ndarray, np.ndarray]], lows: np.ndarray, highs: np.ndarray) -> SecantRaphsonResultArrays:
+        lows = np.ascontiguousarray(lows, dtype=np.float64)
+        highs = np.ascontiguousarray(highs, dtype=np.float64)
+        startTime = time.perf_counter_ns()
+        roots, iterations, errors = batch(lows, highs, float(self.rootTolerance), int(self.rootFindingMaximumIterations))
+        endTime = time.perf_counter_ns()
+        # the intervals are solved together, so each root gets the mean time
+        times = np.full(lows.size, (endTime - startTime) * 1e-9 / lows.size)
+        converged = iterations >= 0
+        return SecantRaphsonResultArrays(lows=lows[converged], highs=highs[converged], roots=roots[converged], iterations=iterations[converged], errors=errors[converged], times=times[converged])
     
-    def findRoots(self, func: Callable[[float],float]) -> list[SecantRaphsonResult] | None:
-        intervals = self.findIntervals(func)
-        if not intervals:
+    def findRoots(self, func: Callable[[float],float], intervals: tuple[np.ndarray, np.ndarray] | None = None) -> SecantRaphsonResultArrays | None:
+        lows, highs = self.findIntervals(func) if intervals is None else intervals
+        if lows.size == 0:
             return None
         
-        results: list[SecantRaphsonResult] = []
-        for interval in intervals:
-            root = self._findRootInInterval(func, interval)
-            if root is not None:
-                results.append(SecantRaphsonResult(root=root, interval=interval))
-        return results
-
-    def printSecantResults(self, roots: list[SecantRaphsonResult]):
-        tableData = []
-        for result in roots:
-            tableData.append([f"[{result.interval.low}, {result.interval.high}]", result.root.root, result.root.iterations, result.root.error, result.root.time * 1000])
+        return self._findRootsInIntervals(makeSecantBatchKernel(func), lows, highs)
+
+    def printSecantResults(self, roots: SecantRaphsonResultArrays):
+        # rows are streamed straight from the result arrays into tabulate
+        tableData = ([f"[{low}, {high}]", root, iterations, error, elapsed * 1000] for low, high, root, iterations, error, elapsed in zip(roots.lows.tolist(), roots.highs.tolist(), roots.roots.tolist(), roots.iterations.tolist(), roots.errors.tolist(), roots.times.tolist()))
         print(tabulate(tableData, headers=["Interval", "Root (x)", "Iterations", "Error", "Time (milliseconds)"]))
     
-    def printRoots(self,root: list[SecantRoot]):
-        tableData = []
-        for result in root:
-            tableData.append([result.root, result.iterations, result.error, result.time * 1000])
-        print(tabulate(tableData, headers=["Root (x)", "Iterations", "Error", "Time (milliseconds)"]))
+    def printRoots(self, roots: SecantRaphsonResultArrays):
+        # one tolist() call converts every row at C level
+        print(tabulate(roots.toRecords().tolist(), headers=["Root (x)", "Iterations", "Error", "Time (milliseconds)"]))
+
+    def dumpRoots(self, roots: SecantRaphsonResultArrays, file=None):
+        dumpRecords(roots.toRecords(), file)
 
 if __name__ == "__main__":
     # Example usage
     def func(x):
-        # return x**2 - 5*x - 2
-        # return x**4 + 10*x**2 - 5*x - 2
-        # return 20*x**6 + 10*x**4 -5*x**3 + 10*x**2 + 5*x - 40
-        # return math.sin(x) * 10 + x**2 -20
-        # return math.pow(math.sin(5*x),2) * 10 + x**2 -4
-        # return x**3 - 6*x**2 + 11*x - 6
+        # Polynomials are written in Horner form with explicit multiplies:
+        # x*x is far cheaper than x**2 or math.pow inside the root-finding loops.
+        # return (x - 5.0)*x - 2.0
+        # return ((x*x + 10.0)*x - 5.0)*x - 2.0
+        # return ((((20.0*x*x + 10.0)*x - 5.0)*x + 10.0)*x + 5.0)*x - 40.0
+        # return 10.0*math.sin(x) + x*x - 20.0
+        # return 5.0*(1.0 - math.cos(10*x)) + x*x - 4.0
+        # return ((x - 6.0)*x + 11.0)*x - 6.0
         # return math.cos(x) - x
-        return math.e**x - 3*x**2
+        return math.e**x - 3.0*x*x
 
     secantFinder = SecantRootFinder(intervalStartPoint=-20, intervalStepSize=0.1, intervalMaxSteps=400, rootTolerance=1e-7, rootFindingMaximumIterations=10000000)
     roots = secantFinder.findRoots(func)